@@ -6,7 +6,9 @@ use anyhow::Result;
 use chrono::{DateTime, Utc};
 use percent_encoding::{percent_decode_str, utf8_percent_encode, NON_ALPHANUMERIC};
 use serde::{Deserialize, Serialize};
+use std::borrow::Cow;
 use std::collections::HashSet;
+use std::io;
 use std::path::{Path, PathBuf};
 
 /// Certificate data stored in cert files.
@@ -19,11 +21,16 @@ pub struct Cert {
 ///
 /// Uses URL percent-encoding to replace special characters like '/', ':', '#', etc.
 pub fn encode_name(name: &str) -> String {
-    utf8_percent_encode(name, NON_ALPHANUMERIC).to_string()
+    Cow::from(utf8_percent_encode(name, NON_ALPHANUMERIC)).into_owned()
 }
 
 /// Decode a filename back to an identifier.
 pub fn decode_name(encoded: &str) -> String {
+    // Nothing to decode without an escape
+    if !encoded.contains('%') {
+        return encoded.to_string();
+    }
+
     percent_decode_str(encoded)
         .decode_utf8_lossy()
         .to_string()
@@ -33,39 +40,63 @@ pub fn decode_name(encoded: &str) -> String {
 pub fn get_existing_certs(certs_dir: &Path) -> Result<HashSet<String>> {
     let mut existing = HashSet::new();
 
-    if !certs_dir.exists() {
-        return Ok(existing);
-    }
+    // A missing certs directory simply means no certs yet
+    let entries = match std::fs::read_dir(certs_dir) {
+        Ok(entries) => entries,
+        Err(e) if e.kind() == std::io::ErrorKind::NotFound => return Ok(existing),
+        Err(e) => return Err(e.into()),
+    };
 
-    for entry in std::fs::read_dir(certs_dir)? {
-        let entry = entry?;
-        let path = entry.path();
-        if path.extension().map_or(false, |ext| ext == "json") {
-            if let Some(stem) = path.file_stem() {
-                let encoded_name = stem.to_string_lossy();
-                let name = decode_name(&encoded_name);
-                existing.insert(name);
+    for entry in entries {
+        let file_name = entry?.file_name();
+        let file_name = file_name.to_string_lossy();
+        match file_name.strip_suffix(".json") {
+            Some(encoded_name) if !encoded_name.is_empty() => {
+                existing.insert(decode_name(encoded_name));
             }
+            _ => {}
         }
     }
 
     Ok(existing)
 }
 
-/// Create a cert file for a function.
-pub fn create_cert(certs_dir: &Path, name: &str) -> Result<PathBuf> {
-    std::fs::create_dir_all(certs_dir)?;
-
-    let encoded_name = encode_name(name);
-    let cert_path = certs_dir.join(format!("{}.json", encoded_name));
-
+/// Serialize a cert stamped with the current time.
+///
+/// Every cert in a batch has the same content, so callers render it once and
+/// pass it to `create_cert` for each function.
+pub fn cert_content() -> Result<String> {
     let cert = Cert {
         timestamp: Utc::now(),
     };
+    Ok(serde_json::to_string_pretty(&cert)?)
+}
+
+/// Create a cert file for a function with pre-rendered `content` from `cert_content`.
+///
+/// Returns the cert path and whether a new file was written; an existing cert is
+/// left untouched, keeping its original timestamp.
+/// `certs_dir` must already exist; callers creating a batch of certs create it once.
+pub fn create_cert(certs_dir: &Path, name: &str, content: &str) -> Result<(PathBuf, bool)> {
+    let mut file_name = encode_name(name);
+    file_name.push_str(".json");
+    let cert_path = certs_dir.join(&file_name);
 
-    let content = serde_json::to_string_pretty(&cert)?;
-    std::fs::write(&cert_path, content)?;
+    // Write to a temp file first and link it into place, so an interrupted write
+    // never leaves a partial cert behind
+    let temp_path = certs_dir.join(format!(".{}.{}.tmp", file_name, std::process::id()));
+    if let Err(e) = std::fs::write(&temp_path, content) {
+        let _ = std::fs::remove_file(&temp_path);
+        return Err(e.into());
+    }
 
-    Ok(cert_path)
+    // Linking fails if the cert already exists, so an existing cert is never replaced
+    let linked = std::fs::hard_link(&temp_path, &cert_path);
+    let _ = std::fs::remove_file(&temp_path);
+    match linked {
+        Ok(()) => Ok((cert_path, true)),
+        Err(e) if e.kind() == io::ErrorKind::AlreadyExists => Ok((cert_path, false)),
+        Err(e) => Err(e.into()),
+    }
 }
 
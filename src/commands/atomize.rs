@@ -5,13 +5,49 @@
 use crate::config::ConfigPaths;
 use crate::frontmatter;
 use crate::probe::{self, ATOMIZE_INTERMEDIATE_FILES};
-use crate::utils::run_command;
-use anyhow::{bail, Context, Result};
-use intervaltree::IntervalTree;
-use serde_json::{json, Value};
+use crate::utils::{
+    deserialize_lenient, deserialize_present, parallel_map, parse_json_entries, write_json_pretty,
+};
+use anyhow::{Context, Result};
+use serde::Deserialize;
+use serde_json::{json, Map, Value};
 use std::collections::HashMap;
+use std::ops::Range;
 use std::path::{Path, PathBuf};
 
+/// Line index over atoms: for each code-path, `(line range, code-name, atom)` entries
+/// sorted by start.
+///
+/// Everything borrows from the atoms map the index is built from, so a hit resolves
+/// to its atom without a second lookup by name.
+type LineIndex<'a> = HashMap<&'a str, Vec<(Range<u32>, &'a str, &'a Atom)>>;
+
+/// Atom from probe-verus atomize output.
+#[derive(Debug, Deserialize)]
+#[serde(rename_all = "kebab-case")]
+struct Atom {
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    code_path: Option<String>,
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    code_text: Option<CodeText>,
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    code_module: Option<String>,
+    #[serde(default, deserialize_with = "deserialize_present")]
+    dependencies: Option<Value>,
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    display_name: Option<String>,
+}
+
+/// Line span of an atom's code.
+#[derive(Debug, Deserialize)]
+#[serde(rename_all = "kebab-case")]
+struct CodeText {
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    lines_start: Option<u64>,
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    lines_end: Option<u64>,
+}
+
 /// Run the atomize subcommand.
 pub fn run(project_root: PathBuf, update_stubs: bool) -> Result<()> {
     let project_root = project_root
@@ -19,12 +55,20 @@ pub fn run(project_root: PathBuf, update_stubs: bool) -> Result<()> {
         .context("Failed to resolve project root")?;
     let config = ConfigPaths::load(&project_root)?;
 
-    // Step 1: Generate stubs.json from .md files using probe-verus stubify
-    let stubs = generate_stubs(&config.structure_root, &config.structure_json_path)?;
+    probe::require_installed()?;
+
+    // Steps 1 and 2 are independent probe-verus runs, so they run concurrently:
+    // stubify generates stubs.json from .md files, atomize generates atoms.json
+    let (stubs, probe_atoms) = std::thread::scope(|s| {
+        let stubs = s.spawn(|| generate_stubs(&config.structure_root, &config.structure_json_path));
+        let probe_atoms = generate_probe_atoms(&project_root, &config.atoms_path);
+        (stubs.join().expect("probe-verus stubify thread panicked"), probe_atoms)
+    });
+
+    let stubs = stubs?;
     println!("Loaded {} stubs from structure files", stubs.len());
 
-    // Step 2: Generate atoms.json using probe-verus atomize
-    let probe_atoms = generate_probe_atoms(&project_root, &config.atoms_path)?;
+    let probe_atoms = probe_atoms?;
     println!("Loaded {} atoms", probe_atoms.len());
 
     // Step 3: Build probe index for fast lookups
@@ -32,15 +76,14 @@ pub fn run(project_root: PathBuf, update_stubs: bool) -> Result<()> {
 
     // Step 4: Enrich stubs with code-name and all atom metadata
     println!("Enriching stubs with atom metadata...");
-    let enriched = enrich_stubs(&stubs, &probe_index, &probe_atoms)?;
+    let enriched = enrich_stubs(stubs, &probe_index, &probe_atoms)?;
 
     // Step 5: Save enriched stubs.json
     println!(
         "Saving enriched stubs to {}...",
         config.structure_json_path.display()
     );
-    let content = serde_json::to_string_pretty(&enriched)?;
-    std::fs::write(&config.structure_json_path, content)?;
+    write_json_pretty(&config.structure_json_path, &enriched)?;
 
     // Optionally update .md files with code-name
     if update_stubs {
@@ -54,8 +97,6 @@ pub fn run(project_root: PathBuf, update_stubs: bool) -> Result<()> {
 
 /// Run probe-verus stubify to generate stubs.json from .md files.
 fn generate_stubs(structure_root: &Path, stubs_path: &Path) -> Result<HashMap<String, Value>> {
-    probe::require_installed()?;
-
     if let Some(parent) = stubs_path.parent() {
         std::fs::create_dir_all(parent)?;
     }
@@ -65,8 +106,7 @@ fn generate_stubs(structure_root: &Path, stubs_path: &Path) -> Result<HashMap<St
         structure_root.display()
     );
 
-    let output = run_command(
-        "probe-verus",
+    probe::run(
         &[
             "stubify",
             structure_root.to_str().unwrap(),
@@ -76,26 +116,15 @@ fn generate_stubs(structure_root: &Path, stubs_path: &Path) -> Result<HashMap<St
         None,
     )?;
 
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        eprintln!("Error: probe-verus stubify failed.");
-        if !stderr.is_empty() {
-            eprintln!("{}", stderr);
-        }
-        bail!("probe-verus stubify failed");
-    }
-
     println!("Stubs saved to {}", stubs_path.display());
 
-    let content = std::fs::read_to_string(stubs_path)?;
-    let stubs: HashMap<String, Value> = serde_json::from_str(&content)?;
+    let content = std::fs::read(stubs_path)?;
+    let stubs: HashMap<String, Value> = serde_json::from_slice(&content)?;
     Ok(stubs)
 }
 
 /// Run probe-verus atomize on the project and save results to atoms.json.
-fn generate_probe_atoms(project_root: &Path, atoms_path: &Path) -> Result<HashMap<String, Value>> {
-    probe::require_installed()?;
-
+fn generate_probe_atoms(project_root: &Path, atoms_path: &Path) -> Result<HashMap<String, Atom>> {
     if let Some(parent) = atoms_path.parent() {
         std::fs::create_dir_all(parent)?;
     }
@@ -105,8 +134,7 @@ fn generate_probe_atoms(project_root: &Path, atoms_path: &Path) -> Result<HashMa
         project_root.display()
     );
 
-    let output = run_command(
-        "probe-verus",
+    probe::run(
         &[
             "atomize",
             project_root.to_str().unwrap(),
@@ -117,103 +145,94 @@ fn generate_probe_atoms(project_root: &Path, atoms_path: &Path) -> Result<HashMa
         None,
     )?;
 
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        eprintln!("Error: probe-verus atomize failed.");
-        if !stderr.is_empty() {
-            eprintln!("{}", stderr);
-        }
-        bail!("probe-verus atomize failed");
-    }
-
     probe::cleanup_intermediate_files(project_root, ATOMIZE_INTERMEDIATE_FILES);
 
     println!("Atoms saved to {}", atoms_path.display());
 
-    let content = std::fs::read_to_string(atoms_path)?;
-    let atoms: HashMap<String, Value> = serde_json::from_str(&content)?;
+    let content = std::fs::read(atoms_path)?;
+    let atoms: HashMap<String, Atom> = parse_json_entries(&content)?;
     Ok(atoms)
 }
 
-/// Build an interval tree index for fast line-based lookups.
-fn build_line_index(atoms: &HashMap<String, Value>) -> HashMap<String, IntervalTree<u32, String>> {
-    let mut trees: HashMap<String, Vec<(std::ops::Range<u32>, String)>> = HashMap::new();
+/// Build a line index for fast line-based lookups.
+///
+/// Atoms are bucketed by code-path in a single pass and each bucket is sorted once.
+fn build_line_index(atoms: &HashMap<String, Atom>) -> LineIndex<'_> {
+    let mut index: LineIndex = HashMap::new();
 
-    for (probe_name, atom_data) in atoms {
-        let code_path = match atom_data.get("code-path").and_then(|v| v.as_str()) {
-            Some(p) => p.to_string(),
+    for (probe_name, atom) in atoms {
+        let code_path = match &atom.code_path {
+            Some(p) => p.as_str(),
             None => continue,
         };
 
-        let code_text = match atom_data.get("code-text") {
+        let code_text = match &atom.code_text {
             Some(ct) => ct,
             None => continue,
         };
 
-        let lines_start = match code_text.get("lines-start").and_then(|v| v.as_u64()) {
+        let lines_start = match code_text.lines_start {
             Some(l) => l as u32,
             None => continue,
         };
 
-        let lines_end = match code_text.get("lines-end").and_then(|v| v.as_u64()) {
+        let lines_end = match code_text.lines_end {
             Some(l) => l as u32,
             None => continue,
         };
 
-        trees
+        index
             .entry(code_path)
             .or_default()
-            .push((lines_start..lines_end + 1, probe_name.clone()));
+            .push((lines_start..lines_end + 1, probe_name.as_str(), atom));
+    }
+
+    for intervals in index.values_mut() {
+        intervals.sort_unstable_by_key(|(range, _, _)| range.start);
     }
 
-    trees
-        .into_iter()
-        .map(|(k, v)| (k, v.into_iter().collect()))
-        .collect()
+    index
 }
 
-/// Look up code-name from code-path and code-line using the probe index.
-fn lookup_code_name(
+/// Look up code-name and atom from code-path and code-line using the probe index.
+///
+/// When atoms nest, the innermost one enclosing the line wins.
+fn lookup_code_name<'a>(
     code_path: &str,
     code_line: u32,
-    index: &HashMap<String, IntervalTree<u32, String>>,
-) -> Option<String> {
-    let tree = index.get(code_path)?;
-
-    let matching: Vec<_> = tree.query(code_line..code_line + 1).collect();
+    index: &LineIndex<'a>,
+) -> Option<(&'a str, &'a Atom)> {
+    let intervals = index.get(code_path)?;
 
-    if matching.is_empty() {
-        return None;
-    }
+    // Intervals are sorted by start, so only this prefix can contain the line
+    let candidates =
+        &intervals[..intervals.partition_point(|(range, _, _)| range.start <= code_line)];
 
-    let exact: Vec<_> = matching
+    // The enclosing interval with the latest start is the innermost one
+    candidates
         .iter()
-        .filter(|iv| iv.range.start == code_line)
-        .collect();
-
-    if !exact.is_empty() {
-        return Some(exact[0].value.clone());
-    }
+        .rev()
+        .find(|(range, _, _)| range.contains(&code_line))
+        .map(|&(_, name, atom)| (name, atom))
+}
 
-    Some(matching[0].value.clone())
+/// Resolve code-name and atom for an entry from its existing code-name, if that atom exists.
+fn resolve_by_code_name<'a>(
+    entry: &Value,
+    atoms: &'a HashMap<String, Atom>,
+) -> Option<(&'a str, &'a Atom)> {
+    let name = entry.get("code-name").and_then(|v| v.as_str())?;
+    atoms
+        .get_key_value(name)
+        .map(|(name, atom)| (name.as_str(), atom))
 }
 
-/// Resolve code-name and atom for an entry.
-/// First tries existing code-name, then falls back to inference from code-path/code-line.
-fn resolve_code_name_and_atom<'a>(
+/// Resolve code-name and atom for an entry by inferring them from code-path/code-line.
+fn resolve_by_location<'a>(
     entry: &Value,
     file_path: &str,
-    index: &HashMap<String, IntervalTree<u32, String>>,
-    atoms: &'a HashMap<String, Value>,
-) -> Option<(String, &'a Value)> {
-    // First try: use existing code-name if present and atom exists
-    if let Some(name) = entry.get("code-name").and_then(|v| v.as_str()) {
-        if let Some(atom) = atoms.get(name) {
-            return Some((name.to_string(), atom));
-        }
-    }
-
-    // Fallback: infer from code-path and code-line
+    index: &LineIndex<'a>,
+) -> Option<(&'a str, &'a Atom)> {
     let code_path = entry.get("code-path").and_then(|v| v.as_str());
     let code_line = entry
         .get("code-line")
@@ -228,34 +247,36 @@ fn resolve_code_name_and_atom<'a>(
         }
     };
 
-    let code_name = lookup_code_name(code_path, code_line, index)?;
-    let atom = atoms.get(&code_name)?;
-
-    Some((code_name, atom))
+    lookup_code_name(code_path, code_line, index)
 }
 
 /// Enrich stubs with code-name and all metadata from atoms.
+///
+/// Takes ownership of the stubs so skipped entries are moved, not cloned.
 fn enrich_stubs(
-    stubs: &HashMap<String, Value>,
-    index: &HashMap<String, IntervalTree<u32, String>>,
-    atoms: &HashMap<String, Value>,
+    stubs: HashMap<String, Value>,
+    index: &LineIndex,
+    atoms: &HashMap<String, Atom>,
 ) -> Result<HashMap<String, Value>> {
     let mut result = HashMap::new();
     let mut enriched_count = 0;
     let mut skipped_count = 0;
 
     for (file_path, entry) in stubs {
-        let (code_name, atom) = match resolve_code_name_and_atom(entry, file_path, index, atoms) {
+        // Prefer the existing code-name; only fall back to inference from code-path/code-line
+        let resolved = resolve_by_code_name(&entry, atoms)
+            .or_else(|| resolve_by_location(&entry, &file_path, index));
+        let (code_name, atom) = match resolved {
             Some(r) => r,
             None => {
                 skipped_count += 1;
-                result.insert(file_path.clone(), entry.clone());
+                result.insert(file_path, entry);
                 continue;
             }
         };
 
-        let enriched_entry = build_enriched_entry(&code_name, atom);
-        result.insert(file_path.clone(), enriched_entry);
+        let enriched_entry = build_enriched_entry(code_name.to_string(), atom);
+        result.insert(file_path, enriched_entry);
         enriched_count += 1;
     }
 
@@ -266,50 +287,36 @@ fn enrich_stubs(
 }
 
 /// Build an enriched entry from atom data.
-fn build_enriched_entry(code_name: &str, atom: &Value) -> Value {
-    let code_path = atom
-        .get("code-path")
-        .and_then(|v| v.as_str())
-        .unwrap_or("");
+///
+/// The entry map is filled directly rather than through `json!`, which would
+/// serialize (and so deep-clone) every value, including the dependencies list.
+fn build_enriched_entry(code_name: String, atom: &Atom) -> Value {
+    let code_path = atom.code_path.as_deref().unwrap_or("");
 
-    let code_text = atom.get("code-text");
+    let code_text = atom.code_text.as_ref();
+    let lines_start = code_text.and_then(|ct| ct.lines_start).unwrap_or(0);
+    let lines_end = code_text.and_then(|ct| ct.lines_end).unwrap_or(0);
 
-    let lines_start = code_text
-        .and_then(|ct| ct.get("lines-start"))
-        .and_then(|v| v.as_u64())
-        .unwrap_or(0);
+    let code_module = atom.code_module.as_deref().unwrap_or("");
 
-    let lines_end = code_text
-        .and_then(|ct| ct.get("lines-end"))
-        .and_then(|v| v.as_u64())
-        .unwrap_or(0);
-
-    let code_module = atom
-        .get("code-module")
-        .and_then(|v| v.as_str())
-        .unwrap_or("");
-
-    let dependencies = atom
-        .get("dependencies")
-        .cloned()
-        .unwrap_or_else(|| json!([]));
-
-    let display_name = atom
-        .get("display-name")
-        .and_then(|v| v.as_str())
-        .unwrap_or("");
-
-    json!({
-        "code-path": code_path,
-        "code-text": {
+    let dependencies = atom.dependencies.clone().unwrap_or_else(|| json!([]));
+
+    let display_name = atom.display_name.as_deref().unwrap_or("");
+
+    let mut entry = Map::new();
+    entry.insert("code-path".to_string(), Value::from(code_path));
+    entry.insert(
+        "code-text".to_string(),
+        json!({
             "lines-start": lines_start,
             "lines-end": lines_end,
-        },
-        "code-name": code_name,
-        "code-module": code_module,
-        "dependencies": dependencies,
-        "display-name": display_name,
-    })
+        }),
+    );
+    entry.insert("code-name".to_string(), Value::String(code_name));
+    entry.insert("code-module".to_string(), Value::from(code_module));
+    entry.insert("dependencies".to_string(), dependencies);
+    entry.insert("display-name".to_string(), Value::from(display_name));
+    Value::Object(entry)
 }
 
 /// Update structure .md files with code-name field from enriched data.
@@ -317,58 +324,74 @@ fn update_structure_files(
     enriched: &HashMap<String, Value>,
     structure_root: &Path,
 ) -> Result<()> {
+    let entries: Vec<(&String, &Value)> = enriched.iter().collect();
+    let results = parallel_map(&entries, |(file_path, entry)| {
+        update_structure_file(file_path, entry, structure_root)
+    });
+
     let mut updated_count = 0;
+    let mut unchanged_count = 0;
     let mut skipped_count = 0;
-
-    for (file_path, entry) in enriched {
-        let path = structure_root.join(file_path);
-        if !path.exists() {
-            skipped_count += 1;
-            continue;
+    for result in results {
+        match result? {
+            StructureUpdate::Updated => updated_count += 1,
+            StructureUpdate::Unchanged => unchanged_count += 1,
+            StructureUpdate::Skipped => skipped_count += 1,
         }
-
-        let code_name = match entry.get("code-name").and_then(|v| v.as_str()) {
-            Some(name) => name,
-            None => {
-                skipped_count += 1;
-                continue;
-            }
-        };
-
-        let fm = match frontmatter::parse(&path) {
-            Ok(fm) => fm,
-            Err(_) => {
-                skipped_count += 1;
-                continue;
-            }
-        };
-
-        // Read original file content to preserve body
-        let original_content = std::fs::read_to_string(&path)?;
-        let body_start = original_content
-            .find("\n---\n")
-            .map(|pos| pos + 5)
-            .and_then(|start| {
-                original_content[start..]
-                    .find("\n---\n")
-                    .map(|p| start + p + 5)
-            });
-
-        let body = body_start.map(|start| original_content[start..].to_string());
-
-        // Build updated frontmatter
-        let mut metadata: HashMap<String, Value> =
-            fm.iter().map(|(k, v)| (k.clone(), v.clone())).collect();
-        metadata.insert("code-name".to_string(), json!(code_name));
-        metadata.remove("code-line");
-        metadata.remove("code-path");
-
-        frontmatter::write(&path, &metadata, body.as_deref())?;
-        updated_count += 1;
     }
 
     println!("Structure files updated: {}", updated_count);
+    println!("Unchanged: {}", unchanged_count);
     println!("Skipped: {}", skipped_count);
 
     Ok(())
 }
+
+/// Outcome of updating a single structure .md file.
+enum StructureUpdate {
+    Updated,
+    Unchanged,
+    Skipped,
+}
+
+/// Update a single structure .md file with its code-name.
+/// Files already up to date are not rewritten.
+fn update_structure_file(
+    file_path: &str,
+    entry: &Value,
+    structure_root: &Path,
+) -> Result<StructureUpdate> {
+    let code_name = match entry.get("code-name").and_then(|v| v.as_str()) {
+        Some(name) => name,
+        None => return Ok(StructureUpdate::Skipped),
+    };
+
+    // Read the file once; a missing or unreadable file is skipped
+    // and the body is sliced out of the same buffer
+    let path = structure_root.join(file_path);
+    let content = match std::fs::read_to_string(&path) {
+        Ok(content) => content,
+        Err(_) => return Ok(StructureUpdate::Skipped),
+    };
+    let (fm, body) = match frontmatter::parse(&content) {
+        Ok(parsed) => parsed,
+        Err(_) => return Ok(StructureUpdate::Skipped),
+    };
+
+    // Already in sync: leave the file untouched rather than rewriting identical content
+    let up_to_date = fm.get("code-name").and_then(|v| v.as_str()) == Some(code_name)
+        && !fm.contains_key("code-line")
+        && !fm.contains_key("code-path");
+    if up_to_date {
+        return Ok(StructureUpdate::Unchanged);
+    }
+
+    // Update the parsed frontmatter in place
+    let mut metadata = fm;
+    metadata.insert("code-name".to_string(), json!(code_name));
+    metadata.remove("code-line");
+    metadata.remove("code-path");
+
+    frontmatter::write(&path, &metadata, body)?;
+    Ok(StructureUpdate::Updated)
+}
@@ -4,10 +4,12 @@
 
 use crate::config::{create_gitignore, Config};
 use crate::frontmatter;
-use crate::utils::{parse_github_link, run_command};
+use crate::utils::{parallel_map, parse_github_link, run_command};
 use anyhow::{bail, Context, Result};
 use serde_json::{json, Value};
 use std::collections::{HashMap, HashSet};
+use std::fs::{File, OpenOptions};
+use std::io::{self, Write};
 use std::path::{Path, PathBuf};
 
 /// Run the create subcommand.
@@ -75,7 +77,7 @@ fn run_analyze_verus_specs_proofs(
         std::fs::create_dir_all(parent)?;
     }
 
-    let output = run_command(
+    let (status, stderr) = run_command(
         "uv",
         &[
             "run",
@@ -88,8 +90,8 @@ fn run_analyze_verus_specs_proofs(
         Some(project_root),
     )?;
 
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
+    if !status.success() {
+        let stderr = String::from_utf8_lossy(&stderr);
         eprintln!("Error running analyze_verus_specs_proofs.py:\n{}", stderr);
         bail!("analyze_verus_specs_proofs.py failed");
     }
@@ -134,37 +136,39 @@ fn read_tracked_csv(csv_path: &Path) -> Result<HashMap<String, TrackedFunction>>
 
 /// Disambiguate tracked items that have the same qualified_name.
 fn disambiguate_names(
-    tracked: HashMap<String, TrackedFunction>,
+    mut tracked: HashMap<String, TrackedFunction>,
 ) -> HashMap<String, TrackedFunction> {
-    let mut name_counts: HashMap<String, usize> = HashMap::new();
+    // Common case: all names are unique. Stops at the first repeat, so only sets
+    // with duplicates pay for counting below.
+    let mut seen: HashSet<&str> = HashSet::with_capacity(tracked.len());
+    if tracked
+        .values()
+        .all(|func| seen.insert(func.qualified_name.as_str()))
+    {
+        return tracked;
+    }
+
+    let mut name_counts: HashMap<&str, usize> = HashMap::new();
     for func in tracked.values() {
-        *name_counts.entry(func.qualified_name.clone()).or_insert(0) += 1;
+        *name_counts.entry(func.qualified_name.as_str()).or_insert(0) += 1;
     }
 
-    let duplicates: HashSet<_> = name_counts
+    // Running suffix index per duplicated name; only duplicated names are copied out
+    let mut name_indices: HashMap<String, usize> = name_counts
         .into_iter()
         .filter(|(_, count)| *count > 1)
-        .map(|(name, _)| name)
+        .map(|(name, _)| (name.to_string(), 0))
         .collect();
 
-    if duplicates.is_empty() {
-        return tracked;
-    }
-
-    let mut name_indices: HashMap<String, usize> =
-        duplicates.iter().map(|n| (n.clone(), 0)).collect();
-    let mut new_tracked = HashMap::new();
-
-    for (key, mut func) in tracked {
-        if duplicates.contains(&func.qualified_name) {
-            let idx = name_indices.get_mut(&func.qualified_name).unwrap();
+    // Rename duplicates in place; unique entries are not touched
+    for func in tracked.values_mut() {
+        if let Some(idx) = name_indices.get_mut(&func.qualified_name) {
             func.qualified_name = format!("{}_{}", func.qualified_name, idx);
             *idx += 1;
         }
-        new_tracked.insert(key, func);
     }
 
-    new_tracked
+    tracked
 }
 
 /// Convert tracked functions to a structure dictionary.
@@ -177,8 +181,18 @@ fn tracked_to_structure(tracked: &HashMap<String, TrackedFunction>) -> HashMap<S
                 continue;
             }
 
-            let func_name = func.qualified_name.replace("::", ".");
-            let file_path = format!("{}/{}.md", code_path, func_name);
+            // Build `<code_path>/<name with :: as .>.md` in a single buffer
+            let mut file_path =
+                String::with_capacity(code_path.len() + func.qualified_name.len() + 4);
+            file_path.push_str(&code_path);
+            file_path.push('/');
+            for (i, segment) in func.qualified_name.split("::").enumerate() {
+                if i > 0 {
+                    file_path.push('.');
+                }
+                file_path.push_str(segment);
+            }
+            file_path.push_str(".md");
 
             result.insert(
                 file_path,
@@ -199,28 +213,23 @@ fn generate_structure_files(
     structure: &HashMap<String, Value>,
     structure_root: &Path,
 ) -> Result<()> {
-    let mut created_count = 0;
-
-    for (relative_path_str, metadata) in structure {
-        let file_path = structure_root.join(relative_path_str);
-
-        if file_path.exists() {
-            eprintln!(
-                "WARNING: File already exists, overwriting: {}",
-                file_path.display()
-            );
-        }
-
-        let mut metadata_map: HashMap<String, Value> = if let Some(obj) = metadata.as_object() {
-            obj.iter().map(|(k, v)| (k.clone(), v.clone())).collect()
-        } else {
-            HashMap::new()
-        };
+    // Many files share a directory, so create each distinct parent once up front
+    let parents: HashSet<&Path> = structure
+        .keys()
+        .filter_map(|relative_path_str| Path::new(relative_path_str).parent())
+        .collect();
+    for parent in parents {
+        std::fs::create_dir_all(structure_root.join(parent))?;
+    }
 
-        let body_content = metadata_map.remove("content");
-        let body = body_content.as_ref().and_then(|v| v.as_str());
+    let entries: Vec<(&String, &Value)> = structure.iter().collect();
+    let results = parallel_map(&entries, |(relative_path_str, metadata)| {
+        generate_structure_file(relative_path_str, metadata, structure_root)
+    });
 
-        frontmatter::write(&file_path, &metadata_map, body)?;
+    let mut created_count = 0;
+    for result in results {
+        result?;
         created_count += 1;
     }
 
@@ -231,3 +240,36 @@ fn generate_structure_files(
     );
     Ok(())
 }
+
+/// Generate a single structure .md file.
+fn generate_structure_file(
+    relative_path_str: &str,
+    metadata: &Value,
+    structure_root: &Path,
+) -> Result<()> {
+    let file_path = structure_root.join(relative_path_str);
+
+    // Read the metadata in place: "content" becomes the body, everything else frontmatter
+    let fields = metadata.as_object().into_iter().flatten();
+    let body = metadata.get("content").and_then(|v| v.as_str());
+    let content = frontmatter::render(fields.filter(|(k, _)| *k != "content"), body)?;
+
+    // Let the open itself report an existing file instead of stat-ing it first
+    let mut file = match OpenOptions::new()
+        .write(true)
+        .create_new(true)
+        .open(&file_path)
+    {
+        Ok(file) => file,
+        Err(e) if e.kind() == io::ErrorKind::AlreadyExists => {
+            eprintln!(
+                "WARNING: File already exists, overwriting: {}",
+                file_path.display()
+            );
+            File::create(&file_path)?
+        }
+        Err(e) => return Err(e.into()),
+    };
+    file.write_all(content.as_bytes())?;
+    Ok(())
+}
@@ -2,16 +2,29 @@
 //!
 //! Check specification status and manage spec certs.
 
-use crate::certs::{create_cert, get_existing_certs};
+use crate::certs::{cert_content, create_cert, get_existing_certs};
 use crate::config::ConfigPaths;
 use crate::probe;
-use crate::utils::{display_menu, run_command};
+use crate::utils::{
+    deserialize_lenient, deserialize_present, display_menu, parallel_map, parse_json_entries,
+    write_json_pretty,
+};
 use std::collections::HashSet;
-use anyhow::{bail, Context, Result};
+use anyhow::{Context, Result};
+use serde::Deserialize;
 use serde_json::Value;
 use std::collections::HashMap;
 use std::path::{Path, PathBuf};
 
+/// Spec info for a function from probe-verus specify output.
+#[derive(Debug, Deserialize)]
+struct SpecInfo {
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    specified: Option<bool>,
+    #[serde(rename = "spec-text", default, deserialize_with = "deserialize_present")]
+    spec_text: Option<Value>,
+}
+
 /// Run the specify subcommand.
 ///
 /// Flow:
@@ -19,10 +32,10 @@ use std::path::{Path, PathBuf};
 /// 2. Run probe-verus specify to get spec info for each function
 /// 3. Enrich stubs with spec-text from specs data (only for specified functions)
 /// 4. Find stubs with spec-text that need certification
-/// 5. Display menu and create certs for selected functions
+/// 5. Display menu (or select everything with `all`) and create certs for selected functions
 /// 6. Update specified status in stubs based on certification
 /// 7. Write updated stubs back to stubs.json
-pub fn run(project_root: PathBuf) -> Result<()> {
+pub fn run(project_root: PathBuf, all: bool) -> Result<()> {
     let project_root = project_root
         .canonicalize()
         .context("Failed to resolve project root")?;
@@ -32,6 +45,11 @@ pub fn run(project_root: PathBuf) -> Result<()> {
     let mut stubs_data = read_stubs_json(&config.structure_json_path)?;
     println!("Loaded {} stubs from stubs.json", stubs_data.len());
 
+    if stubs_data.is_empty() {
+        println!("No stubs found, nothing to specify.");
+        return Ok(());
+    }
+
     // Run probe-verus specify to get spec info
     let specs_path = config.verilib_path.join("specs.json");
     let specs_data = run_probe_specify(&project_root, &specs_path, &config.atoms_path)?;
@@ -45,14 +63,10 @@ pub fn run(project_root: PathBuf) -> Result<()> {
     let uncertified = find_uncertified_functions(&stubs_data, &existing_certs);
 
     // Display menu and create certs for selected functions
-    let newly_certified = collect_certifications(&uncertified, &config.certs_specify_dir)?;
+    let newly_certified = collect_certifications(&uncertified, &config.certs_specify_dir, all)?;
 
-    // Update specified status based on all certified functions
-    let all_certified: HashSet<String> = existing_certs
-        .union(&newly_certified)
-        .cloned()
-        .collect();
-    update_stubs_specification_status(&mut stubs_data, &all_certified);
+    // Update specified status based on all certified functions (existing or new)
+    update_stubs_specification_status(&mut stubs_data, &existing_certs, &newly_certified);
 
     // Write updated stubs back to stubs.json
     write_stubs_json(&config.structure_json_path, &stubs_data)?;
@@ -66,29 +80,29 @@ fn find_uncertified_functions(
     stubs_data: &HashMap<String, Value>,
     existing_certs: &HashSet<String>,
 ) -> HashMap<String, Value> {
-    // Find stubs which have "spec-text" field
-    let stubs_with_specs: HashMap<String, Value> = stubs_data
-        .iter()
-        .filter(|(_, stub)| stub.get("spec-text").is_some())
-        .map(|(k, v)| (k.clone(), v.clone()))
-        .collect();
+    // One pass: count stubs with "spec-text" and keep those without a cert (by code-name),
+    // cloning only the survivors
+    let mut with_specs_count = 0;
+    let mut uncertified = HashMap::new();
+    for (stub_path, stub) in stubs_data {
+        if stub.get("spec-text").is_none() {
+            continue;
+        }
+        with_specs_count += 1;
+
+        let code_name = stub
+            .get("code-name")
+            .and_then(|v| v.as_str())
+            .unwrap_or("");
+        if !existing_certs.contains(code_name) {
+            uncertified.insert(stub_path.clone(), stub.clone());
+        }
+    }
     println!(
         "\nFound {} stubs with spec-text",
-        stubs_with_specs.len()
+        with_specs_count
     );
 
-    // Filter out existing certs (by code-name)
-    let uncertified: HashMap<String, Value> = stubs_with_specs
-        .into_iter()
-        .filter(|(_, stub)| {
-            let code_name = stub
-                .get("code-name")
-                .and_then(|v| v.as_str())
-                .unwrap_or("");
-            !existing_certs.contains(code_name)
-        })
-        .collect();
-
     println!(
         "Found {} stubs needing certification",
         uncertified.len()
@@ -98,10 +112,12 @@ fn find_uncertified_functions(
 }
 
 /// Display menu for uncertified functions and create certs for selected ones.
+/// With `all`, every uncertified function is selected without rendering the menu.
 /// Returns the set of newly certified code-names.
 fn collect_certifications(
     uncertified: &HashMap<String, Value>,
     certs_dir: &Path,
+    all: bool,
 ) -> Result<HashSet<String>> {
     let mut newly_certified = HashSet::new();
 
@@ -115,38 +131,42 @@ fn collect_certifications(
         uncertified.len()
     );
 
-    let mut uncertified_list: Vec<(String, Value)> = uncertified
+    let mut uncertified_list: Vec<(&str, &Value)> = uncertified
         .iter()
-        .map(|(k, v)| (k.clone(), v.clone()))
+        .map(|(k, v)| (k.as_str(), v))
         .collect();
-    uncertified_list.sort_by(|a, b| a.0.cmp(&b.0));
-
-    let selected_indices = display_menu(&uncertified_list, |i, _stub_path, stub| {
-        let display_name = stub
-            .get("display-name")
-            .and_then(|v| v.as_str())
-            .unwrap_or("?");
-        let code_path = stub
-            .get("code-path")
-            .and_then(|v| v.as_str())
-            .unwrap_or("?");
-        let spec_text = stub.get("spec-text");
-        let lines_start = spec_text
-            .and_then(|v| v.get("lines-start"))
-            .and_then(|v| v.as_u64())
-            .map(|l| l.to_string())
-            .unwrap_or_else(|| "?".to_string());
-        let lines_end = spec_text
-            .and_then(|v| v.get("lines-end"))
-            .and_then(|v| v.as_u64())
-            .map(|l| l.to_string())
-            .unwrap_or_else(|| "?".to_string());
-
-        format!(
-            "  [{}] {} ({}#L{}-L{})",
-            i, display_name, code_path, lines_start, lines_end
-        )
-    })?;
+    uncertified_list.sort_unstable_by_key(|(stub_path, _)| *stub_path);
+
+    let selected_indices = if all {
+        (0..uncertified_list.len()).collect()
+    } else {
+        display_menu(&uncertified_list, |i, _stub_path, stub| {
+            let display_name = stub
+                .get("display-name")
+                .and_then(|v| v.as_str())
+                .unwrap_or("?");
+            let code_path = stub
+                .get("code-path")
+                .and_then(|v| v.as_str())
+                .unwrap_or("?");
+            let spec_text = stub.get("spec-text");
+            let lines_start = spec_text
+                .and_then(|v| v.get("lines-start"))
+                .and_then(|v| v.as_u64())
+                .map(|l| l.to_string())
+                .unwrap_or_else(|| "?".to_string());
+            let lines_end = spec_text
+                .and_then(|v| v.get("lines-end"))
+                .and_then(|v| v.as_u64())
+                .map(|l| l.to_string())
+                .unwrap_or_else(|| "?".to_string());
+
+            format!(
+                "  [{}] {} ({}#L{}-L{})",
+                i, display_name, code_path, lines_start, lines_end
+            )
+        })?
+    };
 
     if selected_indices.is_empty() {
         println!("\nNo functions selected.");
@@ -158,25 +178,43 @@ fn collect_certifications(
         selected_indices.len()
     );
 
-    for idx in &selected_indices {
-        let (_stub_path, stub) = &uncertified_list[*idx];
-        let code_name = stub
-            .get("code-name")
-            .and_then(|v| v.as_str())
-            .unwrap_or("");
+    let code_names: Vec<&str> = selected_indices
+        .iter()
+        .map(|&idx| {
+            let (_stub_path, stub) = uncertified_list[idx];
+            stub.get("code-name").and_then(|v| v.as_str()).unwrap_or("")
+        })
+        .collect();
+
+    std::fs::create_dir_all(certs_dir)?;
+    let content = cert_content()?;
+    let results = parallel_map(&code_names, |code_name| {
+        create_cert(certs_dir, code_name, &content)
+    });
+
+    let mut created_count = 0;
+    let mut existing_count = 0;
+    for (code_name, result) in code_names.iter().zip(results) {
+        let (cert_path, created) = result?;
         newly_certified.insert(code_name.to_string());
-        let cert_path = create_cert(certs_dir, code_name)?;
-        println!(
-            "  Created: {}",
-            cert_path.file_name().unwrap_or_default().to_string_lossy()
-        );
+        let file_name = cert_path.file_name().unwrap_or_default().to_string_lossy();
+        if created {
+            created_count += 1;
+            println!("  Created: {}", file_name);
+        } else {
+            existing_count += 1;
+            println!("  Already exists: {}", file_name);
+        }
     }
 
     println!(
         "\nCreated {} cert files in {}",
-        selected_indices.len(),
+        created_count,
         certs_dir.display()
     );
+    if existing_count > 0 {
+        println!("Already certified: {}", existing_count);
+    }
 
     Ok(newly_certified)
 }
@@ -186,7 +224,7 @@ fn run_probe_specify(
     project_root: &Path,
     specs_path: &Path,
     atoms_path: &Path,
-) -> Result<HashMap<String, Value>> {
+) -> Result<HashMap<String, SpecInfo>> {
     probe::require_installed()?;
 
     if let Some(parent) = specs_path.parent() {
@@ -198,8 +236,7 @@ fn run_probe_specify(
         project_root.display()
     );
 
-    let output = run_command(
-        "probe-verus",
+    probe::run(
         &[
             "specify",
             project_root.to_str().unwrap(),
@@ -211,33 +248,28 @@ fn run_probe_specify(
         Some(project_root),
     )?;
 
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        eprintln!("Error: probe-verus specify failed.");
-        if !stderr.is_empty() {
-            eprintln!("{}", stderr);
-        }
-        bail!("probe-verus specify failed");
-    }
-
     println!("Specs saved to {}", specs_path.display());
 
-    let content = std::fs::read_to_string(specs_path)?;
-    let specs: HashMap<String, Value> = serde_json::from_str(&content)?;
+    let content = std::fs::read(specs_path)?;
+    let specs: HashMap<String, SpecInfo> = parse_json_entries(&content)?;
     Ok(specs)
 }
 
 /// Update stubs_data with specification statuses based on certified names.
+///
+/// A name is certified if it is in either set; the sets are probed directly
+/// rather than merged into a copied union.
 fn update_stubs_specification_status(
     stubs_data: &mut HashMap<String, Value>,
-    certified_names: &HashSet<String>,
+    existing_certs: &HashSet<String>,
+    newly_certified: &HashSet<String>,
 ) {
     for entry in stubs_data.values_mut() {
         if let Some(obj) = entry.as_object_mut() {
             let specified = obj
                 .get("code-name")
                 .and_then(|v| v.as_str())
-                .map(|name| certified_names.contains(name))
+                .map(|name| existing_certs.contains(name) || newly_certified.contains(name))
                 .unwrap_or(false);
 
             obj.insert("specified".to_string(), Value::Bool(specified));
@@ -249,19 +281,18 @@ fn update_stubs_specification_status(
 
 /// Read stubs.json into a HashMap.
 fn read_stubs_json(stubs_path: &Path) -> Result<HashMap<String, Value>> {
-    if !stubs_path.exists() {
-        return Ok(HashMap::new());
-    }
-
-    let content = std::fs::read_to_string(stubs_path)?;
-    let stubs: HashMap<String, Value> = serde_json::from_str(&content)?;
+    let content = match std::fs::read(stubs_path) {
+        Ok(content) => content,
+        Err(e) if e.kind() == std::io::ErrorKind::NotFound => return Ok(HashMap::new()),
+        Err(e) => return Err(e.into()),
+    };
+    let stubs: HashMap<String, Value> = serde_json::from_slice(&content)?;
     Ok(stubs)
 }
 
 /// Write stubs_data to stubs.json.
 fn write_stubs_json(stubs_path: &Path, stubs_data: &HashMap<String, Value>) -> Result<()> {
-    let content = serde_json::to_string_pretty(stubs_data)?;
-    std::fs::write(stubs_path, content)?;
+    write_json_pretty(stubs_path, stubs_data)?;
     println!("Wrote stubs to {}", stubs_path.display());
     Ok(())
 }
@@ -271,7 +302,7 @@ fn write_stubs_json(stubs_path: &Path, stubs_data: &HashMap<String, Value>) -> R
 /// and add "spec-text" field if specified is true.
 fn incorporate_spec_text(
     stubs_data: &mut HashMap<String, Value>,
-    specs_data: &HashMap<String, Value>,
+    specs_data: &HashMap<String, SpecInfo>,
 ) {
     let mut count = 0;
     for stub in stubs_data.values_mut() {
@@ -283,13 +314,10 @@ fn incorporate_spec_text(
 
             if let Some(spec_info) = specs_data.get(code_name) {
                 // Only add spec-text if specified is true
-                let is_specified = spec_info
-                    .get("specified")
-                    .and_then(|v| v.as_bool())
-                    .unwrap_or(false);
+                let is_specified = spec_info.specified.unwrap_or(false);
 
                 if is_specified {
-                    if let Some(spec_text) = spec_info.get("spec-text") {
+                    if let Some(spec_text) = &spec_info.spec_text {
                         obj.insert("spec-text".to_string(), spec_text.clone());
                         count += 1;
                     }
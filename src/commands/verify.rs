@@ -4,12 +4,21 @@
 
 use crate::config::ConfigPaths;
 use crate::probe::{self, VERIFY_INTERMEDIATE_FILES};
-use crate::utils::{get_display_name, run_command};
+use crate::utils::{deserialize_lenient, get_display_name, parse_json_entries, write_json_pretty};
 use anyhow::{bail, Context, Result};
+use serde::Deserialize;
 use serde_json::Value;
 use std::collections::HashMap;
+use std::io::{self, Write};
 use std::path::{Path, PathBuf};
 
+/// Proof info for a function from probe-verus verify output.
+#[derive(Debug, Deserialize)]
+struct ProofInfo {
+    #[serde(default, deserialize_with = "deserialize_lenient")]
+    verified: Option<bool>,
+}
+
 /// Run the verify subcommand.
 pub fn run(project_root: PathBuf, verify_only_module: Option<String>) -> Result<()> {
     let project_root = project_root
@@ -19,14 +28,20 @@ pub fn run(project_root: PathBuf, verify_only_module: Option<String>) -> Result<
 
     // Load existing stubs.json
     let stubs_path = &config.structure_json_path;
-    if !stubs_path.exists() {
-        bail!(
+    let stubs_content = match std::fs::read(stubs_path) {
+        Ok(content) => content,
+        Err(e) if e.kind() == std::io::ErrorKind::NotFound => bail!(
             "{} not found. Run 'verilib-structure atomize' first.",
             stubs_path.display()
-        );
+        ),
+        Err(e) => return Err(e.into()),
+    };
+    let mut stubs: HashMap<String, Value> = serde_json::from_slice(&stubs_content)?;
+
+    if stubs.is_empty() {
+        println!("No stubs in {}, nothing to verify.", stubs_path.display());
+        return Ok(());
     }
-    let stubs_content = std::fs::read_to_string(stubs_path)?;
-    let mut stubs: HashMap<String, Value> = serde_json::from_str(&stubs_content)?;
 
     // Run probe-verus verify to generate proofs.json
     let proofs_path = config.verilib_path.join("proofs.json");
@@ -41,12 +56,11 @@ pub fn run(project_root: PathBuf, verify_only_module: Option<String>) -> Result<
     let (newly_verified, newly_unverified) = update_stubs_with_verification(&mut stubs, &proofs_data);
 
     // Save updated stubs.json
-    let stubs_content = serde_json::to_string_pretty(&stubs)?;
-    std::fs::write(stubs_path, stubs_content)?;
+    write_json_pretty(stubs_path, &stubs)?;
     println!("\nUpdated {}", stubs_path.display());
 
     // Print summary
-    print_verification_summary(&newly_verified, &newly_unverified);
+    print_verification_summary(&newly_verified, &newly_unverified)?;
 
     Ok(())
 }
@@ -55,7 +69,7 @@ pub fn run(project_root: PathBuf, verify_only_module: Option<String>) -> Result<
 /// Returns (newly_verified, newly_unverified) lists.
 fn update_stubs_with_verification(
     stubs: &mut HashMap<String, Value>,
-    proofs_data: &HashMap<String, Value>,
+    proofs_data: &HashMap<String, ProofInfo>,
 ) -> (Vec<String>, Vec<String>) {
     let mut newly_verified = Vec::new();
     let mut newly_unverified = Vec::new();
@@ -66,9 +80,13 @@ fn update_stubs_with_verification(
             None => continue,
         };
 
-        // Get the code-name for this stub
-        let code_name = match stub_obj.get("code-name").and_then(|v| v.as_str()) {
-            Some(name) => name.to_string(),
+        // Look up current verification status from proofs.json by code-name,
+        // borrowing the name since it is only needed for the lookup
+        let is_verified = match stub_obj.get("code-name").and_then(|v| v.as_str()) {
+            Some(code_name) => proofs_data
+                .get(code_name)
+                .and_then(|proof| proof.verified)
+                .unwrap_or(false),
             None => continue,
         };
 
@@ -78,13 +96,6 @@ fn update_stubs_with_verification(
             .and_then(|v| v.as_bool())
             .unwrap_or(false);
 
-        // Look up current verification status from proofs.json
-        let is_verified = proofs_data
-            .get(&code_name)
-            .and_then(|v| v.get("verified"))
-            .and_then(|v| v.as_bool())
-            .unwrap_or(false);
-
         // Update the verified field
         stub_obj.insert("verified".to_string(), Value::Bool(is_verified));
 
@@ -96,46 +107,55 @@ fn update_stubs_with_verification(
         }
     }
 
-    newly_verified.sort();
-    newly_unverified.sort();
+    newly_verified.sort_unstable();
+    newly_unverified.sort_unstable();
 
     (newly_verified, newly_unverified)
 }
 
 /// Print summary of verification changes.
-fn print_verification_summary(newly_verified: &[String], newly_unverified: &[String]) {
-    println!();
-    println!("{}", "=".repeat(60));
-    println!("VERIFICATION STATUS CHANGES");
-    println!("{}", "=".repeat(60));
+fn print_verification_summary(
+    newly_verified: &[String],
+    newly_unverified: &[String],
+) -> Result<()> {
+    let mut out = io::BufWriter::new(io::stdout().lock());
+    let rule = "=".repeat(60);
+
+    writeln!(out)?;
+    writeln!(out, "{}", rule)?;
+    writeln!(out, "VERIFICATION STATUS CHANGES")?;
+    writeln!(out, "{}", rule)?;
 
     if !newly_verified.is_empty() {
-        println!("\n✓ Newly verified ({}):", newly_verified.len());
+        writeln!(out, "\n✓ Newly verified ({}):", newly_verified.len())?;
         for stub_name in newly_verified {
             let display_name = get_display_name(stub_name);
-            println!("  + {}", display_name);
-            println!("    {}", stub_name);
+            writeln!(out, "  + {}", display_name)?;
+            writeln!(out, "    {}", stub_name)?;
         }
     } else {
-        println!("\n  No newly verified items");
+        writeln!(out, "\n  No newly verified items")?;
     }
 
     if !newly_unverified.is_empty() {
-        println!("\n✗ Newly unverified ({}):", newly_unverified.len());
+        writeln!(out, "\n✗ Newly unverified ({}):", newly_unverified.len())?;
         for stub_name in newly_unverified {
             let display_name = get_display_name(stub_name);
-            println!("  - {}", display_name);
-            println!("    {}", stub_name);
+            writeln!(out, "  - {}", display_name)?;
+            writeln!(out, "    {}", stub_name)?;
         }
     } else {
-        println!("\n  No newly unverified items");
+        writeln!(out, "\n  No newly unverified items")?;
     }
 
-    println!();
-    println!("{}", "=".repeat(60));
-    println!("  Newly verified: +{}", newly_verified.len());
-    println!("  Newly unverified: -{}", newly_unverified.len());
-    println!("{}", "=".repeat(60));
+    writeln!(out)?;
+    writeln!(out, "{}", rule)?;
+    writeln!(out, "  Newly verified: +{}", newly_verified.len())?;
+    writeln!(out, "  Newly unverified: -{}", newly_unverified.len())?;
+    writeln!(out, "{}", rule)?;
+    out.flush()?;
+
+    Ok(())
 }
 
 /// Run probe-verus verify and return the results.
@@ -144,7 +164,7 @@ fn run_probe_verify(
     proofs_path: &Path,
     atoms_path: &Path,
     verify_only_module: Option<&str>,
-) -> Result<HashMap<String, Value>> {
+) -> Result<HashMap<String, ProofInfo>> {
     probe::require_installed()?;
 
     if let Some(parent) = proofs_path.parent() {
@@ -175,16 +195,8 @@ fn run_probe_verify(
         );
     }
 
-    let output = run_command("probe-verus", &args, Some(project_root))?;
-
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        eprintln!("Error: probe-verus verify failed.");
-        if !stderr.is_empty() {
-            eprintln!("{}", stderr);
-        }
-        bail!("probe-verus verify failed");
-    }
+    // Verification can take minutes; let its diagnostics stream to the terminal
+    probe::run_live(&args, Some(project_root))?;
 
     println!(
         "Verification results saved to {}",
@@ -193,8 +205,8 @@ fn run_probe_verify(
 
     probe::cleanup_intermediate_files(project_root, VERIFY_INTERMEDIATE_FILES);
 
-    let content = std::fs::read_to_string(proofs_path)?;
-    let proofs: HashMap<String, Value> = serde_json::from_str(&content)?;
+    let content = std::fs::read(proofs_path)?;
+    let proofs: HashMap<String, ProofInfo> = parse_json_entries(&content)?;
     Ok(proofs)
 }
 
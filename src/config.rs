@@ -1,5 +1,6 @@
 //! Configuration management for verilib structure.
 
+use crate::utils::write_json_pretty;
 use anyhow::{Context, Result};
 use serde::{Deserialize, Serialize};
 use std::path::{Path, PathBuf};
@@ -35,9 +36,7 @@ impl Config {
         std::fs::create_dir_all(&verilib_path).context("Failed to create .verilib directory")?;
 
         let config_path = verilib_path.join("config.json");
-        let content = serde_json::to_string_pretty(self).context("Failed to serialize config")?;
-
-        std::fs::write(&config_path, content).context("Failed to write config.json")?;
+        write_json_pretty(&config_path, self).context("Failed to write config.json")?;
 
         Ok(config_path)
     }
@@ -61,18 +60,17 @@ impl ConfigPaths {
         let verilib_path = project_root.join(".verilib");
         let config_path = verilib_path.join("config.json");
 
-        if !config_path.exists() {
-            anyhow::bail!(
+        let content = match std::fs::read(&config_path) {
+            Ok(content) => content,
+            Err(e) if e.kind() == std::io::ErrorKind::NotFound => anyhow::bail!(
                 "{} not found. Run 'verilib-structure create' first.",
                 config_path.display()
-            );
-        }
-
-        let content =
-            std::fs::read_to_string(&config_path).context("Failed to read config.json")?;
+            ),
+            Err(e) => return Err(e).context("Failed to read config.json"),
+        };
 
         let config: Config =
-            serde_json::from_str(&content).context("Failed to parse config.json")?;
+            serde_json::from_slice(&content).context("Failed to parse config.json")?;
 
         let structure_root = project_root.join(&config.structure_root);
 
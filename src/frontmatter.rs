@@ -3,47 +3,169 @@
 use anyhow::{bail, Context, Result};
 use serde_json::Value;
 use std::collections::HashMap;
+use std::fmt::Write as _;
 use std::path::Path;
 
-/// Parse YAML frontmatter from a markdown file.
-pub fn parse(path: &Path) -> Result<HashMap<String, Value>> {
-    let content = std::fs::read_to_string(path)?;
-    let mut lines = content.lines();
+/// Parse YAML frontmatter from markdown content and return it with the body.
+///
+/// The body is borrowed from `content`, so callers needing both only read the file once.
+pub fn parse(content: &str) -> Result<(HashMap<String, Value>, Option<&str>)> {
+    let mut lines = content.split_inclusive('\n');
 
     // Check for opening ---
-    match lines.next() {
-        Some("---") => {}
+    let mut offset = match lines.next() {
+        Some(line) if strip_line_ending(line) == "---" => line.len(),
         _ => bail!("No frontmatter found"),
-    }
+    };
 
-    // Collect frontmatter lines until closing ---
-    let mut yaml_lines = Vec::new();
+    // Find the closing --- and slice the frontmatter and body out of content
+    let yaml_start = offset;
+    let mut yaml_end = content.len();
+    let mut body_start = None;
     for line in lines {
-        if line == "---" {
+        if strip_line_ending(line) == "---" {
+            yaml_end = offset;
+            body_start = Some(offset + line.len());
             break;
         }
-        yaml_lines.push(line);
+        offset += line.len();
     }
 
-    let yaml_content = yaml_lines.join("\n");
-    let frontmatter: HashMap<String, Value> =
-        serde_yaml::from_str(&yaml_content).context("Failed to parse YAML frontmatter")?;
+    // Frontmatter written by this tool is flat `key: scalar` lines, which are parsed
+    // directly; anything else goes through the full YAML parser
+    let yaml = &content[yaml_start..yaml_end];
+    let frontmatter: HashMap<String, Value> = match parse_flat(yaml) {
+        Some(frontmatter) => frontmatter,
+        None => serde_yaml::from_str(yaml).context("Failed to parse YAML frontmatter")?,
+    };
+
+    // Undo the blank separator line and trailing newline added by `write`
+    let body = body_start
+        .map(|start| &content[start..])
+        .map(|rest| rest.strip_prefix('\n').unwrap_or(rest))
+        .map(|rest| rest.strip_suffix('\n').unwrap_or(rest))
+        .filter(|rest| !rest.is_empty());
 
-    Ok(frontmatter)
+    Ok((frontmatter, body))
 }
 
-/// Write a markdown file with YAML frontmatter.
-pub fn write(path: &Path, metadata: &HashMap<String, Value>, body: Option<&str>) -> Result<()> {
-    if let Some(parent) = path.parent() {
-        std::fs::create_dir_all(parent)?;
+/// Parse frontmatter consisting only of flat `key: scalar` lines.
+///
+/// Handles the scalars produced by `format_value` (null, booleans, unsigned integers,
+/// plain and double-quoted strings). Returns `None` for anything else so the caller can
+/// fall back to the full YAML parser.
+fn parse_flat(yaml: &str) -> Option<HashMap<String, Value>> {
+    let mut frontmatter = HashMap::new();
+
+    for line in yaml.lines() {
+        if line.is_empty() {
+            continue;
+        }
+
+        let (key, raw) = line.split_once(": ")?;
+        let key_is_plain = !key.is_empty()
+            && key
+                .bytes()
+                .all(|b| b.is_ascii_alphanumeric() || b == b'-' || b == b'_');
+        if !key_is_plain {
+            return None;
+        }
+
+        let value = parse_flat_scalar(raw)?;
+        if frontmatter.insert(key.to_string(), value).is_some() {
+            // Leave duplicate keys to the YAML parser
+            return None;
+        }
     }
 
-    let mut content = String::new();
-    content.push_str("---\n");
+    if frontmatter.is_empty() {
+        return None;
+    }
+
+    Some(frontmatter)
+}
+
+/// Parse a single scalar as written by `format_value`, or `None` if it is not one.
+fn parse_flat_scalar(raw: &str) -> Option<Value> {
+    match raw {
+        "null" | "~" => return Some(Value::Null),
+        "true" => return Some(Value::Bool(true)),
+        "false" => return Some(Value::Bool(false)),
+        _ => {}
+    }
+
+    let bytes = raw.as_bytes();
+    match bytes.first()? {
+        b'"' => {
+            let inner = raw.get(1..raw.len() - 1).filter(|_| raw.ends_with('"'))?;
+            let mut unescaped = String::with_capacity(inner.len());
+            let mut chars = inner.chars();
+            while let Some(c) = chars.next() {
+                match c {
+                    '\\' => match chars.next()? {
+                        '\\' => unescaped.push('\\'),
+                        '"' => unescaped.push('"'),
+                        'n' => unescaped.push('\n'),
+                        _ => return None,
+                    },
+                    '"' => return None,
+                    _ => unescaped.push(c),
+                }
+            }
+            Some(Value::String(unescaped))
+        }
+        b'1'..=b'9' if bytes.iter().all(u8::is_ascii_digit) => {
+            raw.parse::<u64>().ok().map(Value::from)
+        }
+        b'0' if bytes.len() == 1 => Some(Value::from(0u64)),
+        b if b.is_ascii_alphabetic() => {
+            // Plain strings must not be other spellings of YAML null/bool or contain
+            // characters with YAML meaning
+            let lower = raw.to_ascii_lowercase();
+            if matches!(lower.as_str(), "null" | "true" | "false" | "yes" | "no" | "on" | "off")
+                || raw.contains([':', '#'])
+                || raw.ends_with(' ')
+            {
+                return None;
+            }
+            Some(Value::String(raw.to_string()))
+        }
+        _ => None,
+    }
+}
+
+/// Strip a trailing `\n` or `\r\n` from a line.
+fn strip_line_ending(line: &str) -> &str {
+    let line = line.strip_suffix('\n').unwrap_or(line);
+    line.strip_suffix('\r').unwrap_or(line)
+}
+
+/// Write a markdown file with YAML frontmatter.
+///
+/// `metadata` is any sequence of key/value pairs (e.g. `&HashMap` or a filtered
+/// iterator), so callers never need to copy a map just to drop keys from it.
+/// The parent directory must already exist.
+pub fn write<'a, I>(path: &Path, metadata: I, body: Option<&str>) -> Result<()>
+where
+    I: IntoIterator<Item = (&'a String, &'a Value)>,
+{
+    let content = render(metadata, body)?;
+    std::fs::write(path, content)?;
+    Ok(())
+}
+
+/// Render markdown with YAML frontmatter into a single buffer.
+pub fn render<'a, I>(metadata: I, body: Option<&str>) -> Result<String>
+where
+    I: IntoIterator<Item = (&'a String, &'a Value)>,
+{
+    let mut content = String::from("---\n");
 
     for (key, value) in metadata {
-        let formatted = format_value(value)?;
-        content.push_str(&format!("{}: {}\n", key, formatted));
+        content.push_str(key);
+        content.push_str(": ");
+        format_value(&mut content, value)?;
+        content.push('\n');
     }
 
     content.push_str("---\n");
@@ -54,49 +176,141 @@ pub fn write(path: &Path, metadata: &HashMap<String, Value>, body: Option<&str>)
         content.push('\n');
     }
 
-    std::fs::write(path, content)?;
-    Ok(())
+    Ok(content)
 }
 
-/// Format a JSON value as a YAML scalar.
-fn format_value(value: &Value) -> Result<String> {
+/// Format a JSON value as a YAML scalar, appending it to `out`.
+fn format_value(out: &mut String, value: &Value) -> Result<()> {
     match value {
-        Value::Null => Ok("null".to_string()),
-        Value::Bool(b) => Ok(if *b { "true" } else { "false" }.to_string()),
-        Value::Number(n) => Ok(n.to_string()),
+        Value::Null => out.push_str("null"),
+        Value::Bool(b) => out.push_str(if *b { "true" } else { "false" }),
+        Value::Number(n) => write!(out, "{}", n)?,
         Value::String(s) => {
-            // Check if string needs quoting
-            if s.is_empty()
-                || s == "null"
-                || s == "true"
-                || s == "false"
-                || s == "~"
-                || s.starts_with('{')
-                || s.starts_with('[')
-                || s.starts_with('\'')
-                || s.starts_with('"')
-                || s.starts_with('|')
-                || s.starts_with('>')
-                || s.starts_with('*')
-                || s.starts_with('&')
-                || s.starts_with('!')
-                || s.contains(':')
-                || s.contains('#')
-                || s.contains('\n')
+            // Check if string needs quoting: one test on the first char, one scan of the rest
+            if matches!(s.as_str(), "" | "null" | "true" | "false" | "~")
+                || s.starts_with(['{', '[', '\'', '"', '|', '>', '*', '&', '!'])
+                || s.contains([':', '#', '\n'])
             {
-                let escaped = s
-                    .replace('\\', "\\\\")
-                    .replace('"', "\\\"")
-                    .replace('\n', "\\n");
-                Ok(format!("\"{}\"", escaped))
+                // Escape in a single pass
+                out.reserve(s.len() + 2);
+                out.push('"');
+                for c in s.chars() {
+                    match c {
+                        '\\' => out.push_str("\\\\"),
+                        '"' => out.push_str("\\\""),
+                        '\n' => out.push_str("\\n"),
+                        _ => out.push(c),
+                    }
+                }
+                out.push('"');
             } else {
-                Ok(s.clone())
+                out.push_str(s);
             }
         }
         Value::Array(arr) => {
-            let items: Result<Vec<String>> = arr.iter().map(format_value).collect();
-            Ok(format!("[{}]", items?.join(", ")))
+            out.push('[');
+            for (i, item) in arr.iter().enumerate() {
+                if i > 0 {
+                    out.push_str(", ");
+                }
+                format_value(out, item)?;
+            }
+            out.push(']');
         }
         Value::Object(_) => bail!("Nested objects are not supported in metadata"),
     }
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use serde_json::json;
+
+    /// Render `metadata` and `body`, then check both parse back unchanged through the
+    /// flat parser (without the YAML fallback).
+    fn assert_round_trip(metadata: &[(&str, Value)], body: Option<&str>) {
+        let metadata: HashMap<String, Value> = metadata
+            .iter()
+            .map(|(key, value)| (key.to_string(), value.clone()))
+            .collect();
+        let content = render(&metadata, body).unwrap();
+
+        let yaml_end = content[4..].find("---\n").unwrap() + 4;
+        assert_eq!(parse_flat(&content[4..yaml_end]).as_ref(), Some(&metadata));
+
+        let (parsed, parsed_body) = parse(&content).unwrap();
+        assert_eq!(parsed, metadata);
+        assert_eq!(parsed_body, body);
+    }
+
+    #[test]
+    fn round_trips_null_and_bools() {
+        assert_round_trip(
+            &[("a", Value::Null), ("b", json!(true)), ("c", json!(false))],
+            None,
+        );
+    }
+
+    #[test]
+    fn round_trips_integers() {
+        assert_round_trip(
+            &[("zero", json!(0)), ("line", json!(42)), ("max", json!(u64::MAX))],
+            None,
+        );
+    }
+
+    #[test]
+    fn round_trips_strings() {
+        assert_round_trip(
+            &[
+                ("empty", json!("")),
+                ("plain", json!("probe:crate/mod#func()")),
+                ("words", json!("some words")),
+                ("keyword", json!("null")),
+                ("bool", json!("true")),
+                ("escapes", json!("a\\b \"c\"\nd")),
+                ("colon", json!("key: value")),
+                ("quote", json!("\"quoted\"")),
+            ],
+            None,
+        );
+    }
+
+    #[test]
+    fn round_trips_bodies() {
+        assert_round_trip(&[("code-name", json!("func"))], Some("Body text"));
+        assert_round_trip(&[("code-name", json!("func"))], Some("Line one\n\nLine three"));
+        assert_round_trip(&[("code-name", json!("func"))], None);
+    }
+
+    #[test]
+    fn rejects_other_null_and_bool_spellings() {
+        for raw in ["Yes", "no", "On", "NULL", "Null", "True", "FALSE"] {
+            assert_eq!(parse_flat_scalar(raw), None, "{}", raw);
+        }
+    }
+
+    #[test]
+    fn rejects_ambiguous_numbers() {
+        assert_eq!(parse_flat_scalar("007"), None);
+        assert_eq!(parse_flat_scalar("18446744073709551616"), None);
+        assert_eq!(parse_flat_scalar("-1"), None);
+        assert_eq!(parse_flat_scalar("1.5"), None);
+    }
+
+    #[test]
+    fn rejects_ambiguous_plain_strings() {
+        assert_eq!(parse_flat_scalar("x # c"), None);
+        assert_eq!(parse_flat_scalar("x: y"), None);
+        assert_eq!(parse_flat_scalar("trailing "), None);
+        assert_eq!(parse_flat("key:  two spaces\n"), None);
+    }
+
+    #[test]
+    fn rejects_unknown_escapes() {
+        assert_eq!(parse_flat_scalar(r#""a\tb""#), None);
+        assert_eq!(parse_flat_scalar(r#""a\"#), None);
+        assert_eq!(parse_flat_scalar(r#""a"b""#), None);
+    }
 }
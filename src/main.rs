@@ -57,6 +57,10 @@ enum Commands {
         /// Project root directory (default: current working directory)
         #[arg(default_value = ".")]
         project_root: PathBuf,
+
+        /// Certify all uncertified functions without showing the selection menu
+        #[arg(short = 'a', long)]
+        all: bool,
     },
 
     /// Run verification and update stubs.json with status
@@ -80,7 +84,7 @@ fn main() -> Result<()> {
             project_root,
             update_stubs,
         } => commands::atomize::run(project_root, update_stubs),
-        Commands::Specify { project_root } => commands::specify::run(project_root),
+        Commands::Specify { project_root, all } => commands::specify::run(project_root, all),
         Commands::Verify {
             project_root,
             verify_only_module,
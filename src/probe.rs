@@ -2,6 +2,7 @@
 //!
 //! Handles interaction with the probe-verus CLI tool.
 
+use crate::utils::{run_command, run_command_live};
 use anyhow::{bail, Result};
 use std::path::Path;
 
@@ -23,26 +24,49 @@ pub fn require_installed() -> Result<()> {
     Ok(())
 }
 
+/// Run a probe-verus subcommand (`args[0]`), bailing with its stderr if it fails.
+pub fn run(args: &[&str], cwd: Option<&Path>) -> Result<()> {
+    let (status, stderr) = run_command("probe-verus", args, cwd)?;
+
+    if !status.success() {
+        let subcommand = args.first().copied().unwrap_or_default();
+        let stderr = String::from_utf8_lossy(&stderr);
+        eprintln!("Error: probe-verus {} failed.", subcommand);
+        if !stderr.is_empty() {
+            eprintln!("{}", stderr);
+        }
+        bail!("probe-verus {} failed", subcommand);
+    }
+
+    Ok(())
+}
+
+/// Run a probe-verus subcommand (`args[0]`) with its stderr shown live, bailing if it fails.
+///
+/// Used for long runs such as verify, where progress should be visible as it happens.
+pub fn run_live(args: &[&str], cwd: Option<&Path>) -> Result<()> {
+    let status = run_command_live("probe-verus", args, cwd)?;
+
+    if !status.success() {
+        let subcommand = args.first().copied().unwrap_or_default();
+        eprintln!("Error: probe-verus {} failed (see output above).", subcommand);
+        bail!("probe-verus {} failed", subcommand);
+    }
+
+    Ok(())
+}
+
 /// Clean up generated intermediate files from probe-verus commands.
 ///
 /// Removes common intermediate files and the data directory if empty.
 pub fn cleanup_intermediate_files(project_root: &Path, files: &[&str]) {
+    // Missing files are fine
     for file in files {
-        let path = project_root.join(file);
-        if path.exists() {
-            let _ = std::fs::remove_file(&path);
-        }
+        let _ = std::fs::remove_file(project_root.join(file));
     }
 
-    // Remove data directory if empty
-    let data_dir = project_root.join("data");
-    if data_dir.exists() && data_dir.is_dir() {
-        if let Ok(mut entries) = std::fs::read_dir(&data_dir) {
-            if entries.next().is_none() {
-                let _ = std::fs::remove_dir(&data_dir);
-            }
-        }
-    }
+    // Remove data directory if empty (remove_dir fails on missing or non-empty directories)
+    let _ = std::fs::remove_dir(project_root.join("data"));
 }
 
 /// Common intermediate files generated by atomize command.
@@ -1,54 +1,195 @@
 //! General utility functions for verilib structure.
 
 use anyhow::{Context, Result};
+use serde::de::DeserializeOwned;
+use serde::{Deserialize, Deserializer, Serialize};
 use serde_json::Value;
-use std::collections::HashSet;
-use std::io::{self, BufRead, Write};
+use std::collections::{HashMap, HashSet};
+use std::fs::File;
+use std::io::{self, BufRead, Read, Write};
 use std::path::Path;
-use std::process::Command;
+use std::process::{Command, ExitStatus, Stdio};
 
-/// Run an external command and return its output.
-pub fn run_command(program: &str, args: &[&str], cwd: Option<&Path>) -> Result<std::process::Output> {
+/// Maximum number of trailing stderr bytes kept from an external command.
+const STDERR_TAIL_BYTES: usize = 64 * 1024;
+
+/// Run an external command and return its exit status with the tail of its stderr.
+///
+/// Only stderr is captured (for error reporting); the tools write their results
+/// to files, so stdout is discarded rather than buffered in memory. Stderr is
+/// drained as it is produced and only its last `STDERR_TAIL_BYTES` are kept, so a
+/// chatty run cannot grow the buffer without bound.
+pub fn run_command(
+    program: &str,
+    args: &[&str],
+    cwd: Option<&Path>,
+) -> Result<(ExitStatus, Vec<u8>)> {
+    let mut cmd = Command::new(program);
+    cmd.args(args).stdout(Stdio::null()).stderr(Stdio::piped());
+
+    if let Some(dir) = cwd {
+        cmd.current_dir(dir);
+    }
+
+    let mut child = cmd
+        .spawn()
+        .context(format!("Failed to run {}", program))?;
+
+    let mut stderr = Vec::new();
+    if let Some(mut pipe) = child.stderr.take() {
+        let mut chunk = [0u8; 8192];
+        loop {
+            let n = match pipe.read(&mut chunk) {
+                Ok(0) => break,
+                Ok(n) => n,
+                Err(e) if e.kind() == io::ErrorKind::Interrupted => continue,
+                Err(e) => {
+                    let _ = child.kill();
+                    let _ = child.wait();
+                    return Err(e).context(format!("Failed to read {} output", program));
+                }
+            };
+            stderr.extend_from_slice(&chunk[..n]);
+            // Trim in batches so the drain is amortized over many reads
+            if stderr.len() > 2 * STDERR_TAIL_BYTES {
+                stderr.drain(..stderr.len() - STDERR_TAIL_BYTES);
+            }
+        }
+    }
+    if stderr.len() > STDERR_TAIL_BYTES {
+        stderr.drain(..stderr.len() - STDERR_TAIL_BYTES);
+    }
+
+    let status = child
+        .wait()
+        .context(format!("Failed to run {}", program))?;
+    Ok((status, stderr))
+}
+
+/// Run an external command with its stderr passed straight through to the terminal.
+///
+/// For long-running tools whose diagnostics should be seen as they happen;
+/// stdout is discarded and nothing is buffered in memory.
+pub fn run_command_live(program: &str, args: &[&str], cwd: Option<&Path>) -> Result<ExitStatus> {
     let mut cmd = Command::new(program);
-    cmd.args(args);
+    cmd.args(args).stdout(Stdio::null()).stderr(Stdio::inherit());
 
     if let Some(dir) = cwd {
         cmd.current_dir(dir);
     }
 
-    let output = cmd
-        .output()
+    let status = cmd
+        .status()
         .context(format!("Failed to run {}", program))?;
-    Ok(output)
+    Ok(status)
+}
+
+/// Write `value` to `path` as pretty-printed JSON.
+///
+/// Serializes straight into a buffered file writer instead of building the
+/// whole document as a String first.
+pub fn write_json_pretty<T: Serialize + ?Sized>(path: &Path, value: &T) -> Result<()> {
+    let file = File::create(path).context(format!("Failed to create {}", path.display()))?;
+    let mut writer = io::BufWriter::new(file);
+    serde_json::to_writer_pretty(&mut writer, value)?;
+    writer.flush()?;
+    Ok(())
+}
+
+/// Deserialize an optional field, treating a value of the wrong type as missing.
+///
+/// Use with `#[serde(default, deserialize_with = "deserialize_lenient")]` so one
+/// malformed field does not fail the whole file.
+pub fn deserialize_lenient<'de, D, T>(deserializer: D) -> std::result::Result<Option<T>, D::Error>
+where
+    D: Deserializer<'de>,
+    T: DeserializeOwned,
+{
+    let value = Value::deserialize(deserializer)?;
+    Ok(serde_json::from_value(value).ok())
+}
+
+/// Deserialize an optional field, keeping an explicit null as `Some(Value::Null)`.
+pub fn deserialize_present<'de, D>(deserializer: D) -> std::result::Result<Option<Value>, D::Error>
+where
+    D: Deserializer<'de>,
+{
+    Value::deserialize(deserializer).map(Some)
+}
+
+/// Map value that deserializes to `None` instead of failing when it does not fit `T`.
+#[derive(Deserialize)]
+#[serde(transparent, bound = "T: DeserializeOwned")]
+struct LenientEntry<T>(#[serde(deserialize_with = "deserialize_lenient")] Option<T>);
+
+/// Parse a JSON object of named entries, skipping entries that are not a valid `T`
+/// (e.g. `null` or a number where an object is expected).
+pub fn parse_json_entries<T: DeserializeOwned>(bytes: &[u8]) -> Result<HashMap<String, T>> {
+    let entries: HashMap<String, LenientEntry<T>> = serde_json::from_slice(bytes)?;
+    Ok(entries
+        .into_iter()
+        .filter_map(|(name, entry)| Some((name, entry.0?)))
+        .collect())
+}
+
+/// Apply `f` to every item, spreading the items across one scoped thread per core.
+///
+/// For independent per-item work such as reading or writing one file per item.
+/// Results are returned in the same order as `items`.
+pub fn parallel_map<T, R, F>(items: &[T], f: F) -> Vec<R>
+where
+    T: Sync,
+    R: Send,
+    F: Fn(&T) -> R + Sync,
+{
+    let workers = std::thread::available_parallelism().map_or(1, |n| n.get());
+    let chunk_size = items.len().div_ceil(workers).max(1);
+    let f = &f;
+
+    std::thread::scope(|s| {
+        let handles: Vec<_> = items
+            .chunks(chunk_size)
+            .map(|chunk| s.spawn(move || chunk.iter().map(f).collect::<Vec<R>>()))
+            .collect();
+
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().expect("worker thread panicked"))
+            .collect()
+    })
 }
 
 /// Display a multiple choice menu and get user selections.
-pub fn display_menu<F>(items: &[(String, Value)], format_item: F) -> Result<Vec<usize>>
+pub fn display_menu<F>(items: &[(&str, &Value)], format_item: F) -> Result<Vec<usize>>
 where
     F: Fn(usize, &str, &Value) -> String,
 {
-    println!();
-    println!("{}", "=".repeat(60));
-    println!("Functions with specs but no certification:");
-    println!("{}", "=".repeat(60));
-    println!();
+    let mut out = io::BufWriter::new(io::stdout().lock());
+    let rule = "=".repeat(60);
+
+    writeln!(out)?;
+    writeln!(out, "{}", rule)?;
+    writeln!(out, "Functions with specs but no certification:")?;
+    writeln!(out, "{}", rule)?;
+    writeln!(out)?;
 
     for (i, (name, info)) in items.iter().enumerate() {
-        println!("{}", format_item(i + 1, name, info));
-        println!();
+        writeln!(out, "{}", format_item(i + 1, name, info))?;
+        writeln!(out)?;
     }
 
-    println!("{}", "=".repeat(60));
-    println!();
-    println!("Enter selection:");
-    println!("  - Individual numbers: 1, 3, 5");
-    println!("  - Ranges: 1-5");
-    println!("  - 'all' to select all");
-    println!("  - 'none' or empty to skip");
-    println!();
+    writeln!(out, "{}", rule)?;
+    writeln!(out)?;
+    writeln!(out, "Enter selection:")?;
+    writeln!(out, "  - Individual numbers: 1, 3, 5")?;
+    writeln!(out, "  - Ranges: 1-5")?;
+    writeln!(out, "  - 'all' to select all")?;
+    writeln!(out, "  - 'none' or empty to skip")?;
+    writeln!(out)?;
 
-    print!("Your selection: ");
-    io::stdout().flush()?;
+    write!(out, "Your selection: ")?;
+    out.flush()?;
+    drop(out);
 
     let mut input = String::new();
     io::stdin().lock().read_line(&mut input)?;
@@ -63,20 +204,19 @@ where
     }
 
     let mut selected = HashSet::new();
-    for part in input.replace(',', " ").split_whitespace() {
-        if part.contains('-') {
-            let parts: Vec<&str> = part.splitn(2, '-').collect();
-            if parts.len() == 2 {
-                if let (Ok(start), Ok(end)) = (parts[0].parse::<usize>(), parts[1].parse::<usize>())
-                {
-                    for i in start..=end {
-                        if i >= 1 && i <= items.len() {
-                            selected.insert(i - 1);
-                        }
-                    }
-                } else {
-                    eprintln!("Warning: Invalid range '{}', skipping", part);
-                }
+    // Commas and whitespace both separate entries
+    let parts = input
+        .split(|c: char| c == ',' || c.is_whitespace())
+        .filter(|part| !part.is_empty());
+    for part in parts {
+        if let Some((start, end)) = part.split_once('-') {
+            if let (Ok(start), Ok(end)) = (start.parse::<usize>(), end.parse::<usize>()) {
+                // Clip to the valid 1-based range
+                let lo = start.max(1) - 1;
+                let hi = end.min(items.len());
+                selected.extend(lo..hi);
+            } else {
+                eprintln!("Warning: Invalid range '{}', skipping", part);
             }
         } else if let Ok(idx) = part.parse::<usize>() {
             if idx >= 1 && idx <= items.len() {
@@ -96,11 +236,7 @@ where
 
 /// Extract code path and line number from a GitHub link.
 pub fn parse_github_link(github_link: &str) -> Option<(String, u32)> {
-    if github_link.is_empty() || !github_link.contains("/blob/main/") {
-        return None;
-    }
-
-    let path_part = github_link.split("/blob/main/").nth(1)?;
+    let (_, path_part) = github_link.split_once("/blob/main/")?;
 
     if let Some((code_path, line_str)) = path_part.rsplit_once("#L") {
         let line_number: u32 = line_str.parse().ok()?;
@@ -111,10 +247,36 @@ pub fn parse_github_link(github_link: &str) -> Option<(String, u32)> {
 }
 
 /// Get a display name from a full identifier (e.g., extract "func" from "probe:crate/mod#func()").
-pub fn get_display_name(name: &str) -> String {
-    if let Some(pos) = name.rfind('#') {
-        name[pos + 1..].trim_end_matches("()").to_string()
-    } else {
-        name.to_string()
+pub fn get_display_name(name: &str) -> &str {
+    match name.rsplit_once('#') {
+        Some((_, func)) => func.trim_end_matches("()"),
+        None => name,
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[derive(Debug, Deserialize, PartialEq)]
+    struct Entry {
+        #[serde(default, deserialize_with = "deserialize_lenient")]
+        line: Option<u64>,
+    }
+
+    #[test]
+    fn parse_json_entries_skips_malformed_entries() {
+        let json = br#"{"a": {"line": 3}, "b": null, "c": 3, "d": "x", "e": {"line": -1}}"#;
+        let entries: HashMap<String, Entry> = parse_json_entries(json).unwrap();
+
+        assert_eq!(entries.len(), 2);
+        assert_eq!(entries["a"], Entry { line: Some(3) });
+        assert_eq!(entries["e"], Entry { line: None });
+    }
+
+    #[test]
+    fn parse_json_entries_rejects_invalid_json() {
+        assert!(parse_json_entries::<Entry>(b"[1, 2]").is_err());
+        assert!(parse_json_entries::<Entry>(b"{").is_err());
     }
 }